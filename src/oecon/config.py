@@ -1,8 +1,11 @@
+import json
 import logging
 import os
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from os import PathLike
 
+import numpy as np
+
 from oecon.decimation import DecimationConfig
 from oecon.events import EventPreprocessingConfig
 from oecon.raw import RawConfig
@@ -36,17 +39,14 @@ class OpenEphysToDhConfig:
     )
 
 
-def save_config_to_file(config_filename: PathLike, config: OpenEphysToDhConfig) -> None:
-    import json
-    from dataclasses import asdict
-    import numpy as np
+class NumpyEncoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        return super().default(o)
 
-    class NumpyEncoder(json.JSONEncoder):
-        def default(self, o):
-            if isinstance(o, np.ndarray):
-                return o.tolist()
-            return super().default(o)
 
+def save_config_to_file(config_filename: PathLike, config: OpenEphysToDhConfig) -> None:
     logger.info(f"Saving configration to {config_filename}")
     jsonstringconf = json.dumps(asdict(config), indent=True, cls=NumpyEncoder)
     with open(config_filename, mode="w") as config_file:
@@ -59,8 +59,6 @@ def load_config_from_file(config_path: PathLike) -> OpenEphysToDhConfig:
 
     logger.info(f"Loading configuration from {config_path}")
     with open(config_path, "r") as f:
-        import json
-
         config_data = json.load(f)
 
     if "config_version" not in config_data:
@@ -47,7 +47,7 @@ def convert_open_ephys_recording_to_dh5(
         )
 
     board_names = [
-        f"{cont.metadata.source_node_name}:{cont.metadata.source_node_id}"
+        f"{(metadata := cont.metadata).source_node_name}:{metadata.source_node_id}"
         for cont in recording.continuous
     ]
     dh5filename = f"{session_name}_{recording_index}.dh5"
@@ -25,6 +25,12 @@ class DecimationConfig:
     included_channel_names: list[str] | None = None  # doall if None
     start_block_id: int = 2001
     scale_max_abs_to: np.int16 | None = None
+    # Upper limit for the float64 samples of the channels that are loaded and
+    # filtered together. Batches hold at least one channel, so long
+    # recordings are processed channel by channel as before; short ones
+    # benefit from decimating many channels in one call. The filter
+    # temporaries come on top and scale with the batch as well.
+    max_batch_bytes: int = 1 << 30
 
 
 def decimate_np_array(
@@ -64,23 +70,35 @@ def decimate_raw_data(
         else:
             included_channel_names.extend(config.included_channel_names)
 
-        # TODO: Use chunks of channels in parallel
         logger.info(
             f"Decimating ({oe_metadata.sample_rate} -> {oe_metadata.sample_rate / config.downsampling_factor} Hz) {oe_metadata.num_channels} channels continuous data from {oe_metadata.source_node_name} ({oe_metadata.source_node_id})"
         )
-        for channel_index, channel_name in enumerate(oe_metadata.channel_names):
-            # skip channel if not in included channels
-            if channel_name not in included_channel_names:
-                continue
+        selected_channels = [
+            (channel_index, channel_name)
+            for channel_index, channel_name in enumerate(oe_metadata.channel_names)
+            if channel_name in included_channel_names
+        ]
+        sample_period_ns = np.int32(
+            1.0 / oe_metadata.sample_rate * 1e9 * config.downsampling_factor
+        )
 
+        # decimate batches of channels at once, only writing is done per channel
+        bytes_per_channel = (
+            max(1, oe_cont.samples.shape[0]) * np.dtype(np.float64).itemsize
+        )
+        channels_per_batch = max(1, config.max_batch_bytes // bytes_per_channel)
+        for batch_start in range(0, len(selected_channels), channels_per_batch):
+            batch = selected_channels[batch_start : batch_start + channels_per_batch]
             samples = oe_cont.get_samples(
                 start_sample_index=0,
                 end_sample_index=-1,
                 selected_channels=None,
-                selected_channel_names=[channel_name],
+                selected_channel_names=[channel_name for _, channel_name in batch],
             )
+            logger.debug(f"Data range: {np.min(samples)} - {np.max(samples)}")
+
             # samples x channels
-            decimated_samples = decimate_np_array(
+            decimated_batch = decimate_np_array(
                 data=samples,
                 downsampling_factor=config.downsampling_factor,
                 filter_order=config.filter_order,
@@ -89,41 +107,41 @@ def decimate_raw_data(
                 zero_phase=config.zero_phase,
             )
 
-            channel_info = dhspec.cont.create_channel_info(
-                GlobalChanNumber=global_channel_index,
-                BoardChanNo=channel_index,
-                ADCBitWidth=16,
-                MaxVoltageRange=10.0,
-                MinVoltageRange=10.0,
-                AmplifChan0=0,
-            )
+            for batch_index, (channel_index, channel_name) in enumerate(batch):
+                decimated_samples = decimated_batch[:, batch_index : batch_index + 1]
 
-            logger.debug(f"Data range: {np.min(samples)} - {np.max(samples)}")
-            if config.scale_max_abs_to is not None:
-                decimated_samples, scaling_factor = scale_to_16_bit_range(
-                    decimated_samples
+                channel_info = dhspec.cont.create_channel_info(
+                    GlobalChanNumber=global_channel_index,
+                    BoardChanNo=channel_index,
+                    ADCBitWidth=16,
+                    MaxVoltageRange=10.0,
+                    MinVoltageRange=10.0,
+                    AmplifChan0=0,
+                )
+
+                if config.scale_max_abs_to is not None:
+                    decimated_samples, scaling_factor = scale_to_16_bit_range(
+                        decimated_samples
+                    )
+                else:
+                    # use original scaling factor (bit_volts)
+                    scaling_factor = oe_cont.metadata.bit_volts[channel_index]
+                    decimated_samples /= scaling_factor
+                    decimated_samples = decimated_samples.astype(np.int16)
+
+                dh5io.cont.create_cont_group_from_data_in_file(
+                    file=dh5file.file,
+                    cont_group_id=dh5_cont_id,
+                    data=decimated_samples,
+                    index=dhspec.cont.create_empty_index_array(1),
+                    sample_period_ns=sample_period_ns,
+                    name=f"{oe_metadata.stream_name}/{channel_name}/LFP",
+                    channels=channel_info,
+                    calibration=np.array(np.float64(scaling_factor)),
                 )
-            else:
-                # use original scaling factor (bit_volts)
-                scaling_factor = oe_cont.metadata.bit_volts[channel_index]
-                decimated_samples /= scaling_factor
-                decimated_samples = decimated_samples.astype(np.int16)
-
-            dh5io.cont.create_cont_group_from_data_in_file(
-                file=dh5file.file,
-                cont_group_id=dh5_cont_id,
-                data=decimated_samples,
-                index=dhspec.cont.create_empty_index_array(1),
-                sample_period_ns=np.int32(
-                    1.0 / oe_metadata.sample_rate * 1e9 * config.downsampling_factor
-                ),
-                name=f"{oe_metadata.stream_name}/{channel_name}/LFP",
-                channels=channel_info,
-                calibration=np.array(np.float64(scaling_factor)),
-            )
 
-            dh5_cont_id += 1
-            global_channel_index += 1
+                dh5_cont_id += 1
+                global_channel_index += 1
 
     dh5io.operations.add_operation_to_file(
         dh5file.file,
@@ -1,9 +1,10 @@
 import logging
 import os
-import pprint
 import warnings
 from dataclasses import dataclass, field
+from fractions import Fraction
 from pathlib import Path
+from typing import Callable
 
 import dh5io
 import dh5io.event_triggers
@@ -42,6 +43,25 @@ class EventMetadata:
     initial_state: int = 0
 
 
+def _sample_numbers_to_ns(sample_numbers: np.ndarray, sample_rate: float) -> np.ndarray:
+    """Convert sample numbers to int64 nanoseconds using integer math only.
+
+    The sample period is kept as an exact fraction of nanoseconds (e.g.
+    100000/3 ns at 30 kHz) and the result is rounded to the nearest
+    nanosecond. Unlike going through float64 seconds, this does not lose
+    precision for long recordings.
+    """
+    sample_period_ns = Fraction(10**9) / Fraction(sample_rate).limit_denominator(1000)
+    numerator, denominator = sample_period_ns.as_integer_ratio()
+    whole_ns, remainder = divmod(numerator, denominator)
+
+    sample_numbers = np.asarray(sample_numbers, dtype=np.int64)
+    return (
+        sample_numbers * whole_ns
+        + (sample_numbers * remainder + denominator // 2) // denominator
+    )
+
+
 @dataclass
 class Messages:
     metadata: EventMetadata
@@ -59,23 +79,37 @@ class Messages:
             }
 
     def __str__(self):
-        metadata_str = pprint.pformat(self.metadata)
         return (
             f"Messages Data: {self.metadata.folder_name}')\n"
             f"├─── Text: {self.text.shape}\n"
             f"├─── Sample Numbers: {self.sample_numbers.shape}\n"
-            f"└─── {metadata_str}\n"
+            f"└─── {self.metadata!r}\n"
         )
 
     @staticmethod
-    def from_folder(full_event_folder_path: str | Path, metadata: EventMetadata):
+    def from_folder(
+        full_event_folder_path: str | Path, metadata: EventMetadata, mmap: bool = True
+    ):
+        """Load message arrays from an event folder.
+
+        By default the arrays are memory-mapped read-only, so only the parts
+        that are accessed are read from disk. Use mmap=False for writeable
+        in-memory arrays.
+        """
+        mmap_mode = "r" if mmap else None
         return Messages(
             metadata=metadata,
-            text=np.load(os.path.join(full_event_folder_path, "text.npy")),
+            text=np.load(
+                os.path.join(full_event_folder_path, "text.npy"), mmap_mode=mmap_mode
+            ),
             sample_numbers=np.load(
-                os.path.join(full_event_folder_path, "sample_numbers.npy")
+                os.path.join(full_event_folder_path, "sample_numbers.npy"),
+                mmap_mode=mmap_mode,
+            ),
+            timestamps=np.load(
+                os.path.join(full_event_folder_path, "timestamps.npy"),
+                mmap_mode=mmap_mode,
             ),
-            timestamps=np.load(os.path.join(full_event_folder_path, "timestamps.npy")),
         )
 
 
@@ -87,7 +121,8 @@ class Event:
     states: np.ndarray
     sample_numbers: np.ndarray
 
-    def __len__(self):
+    def __post_init__(self):
+        # verify all arrays have same length
         assert (
             len(self.full_words)
             == len(self.timestamps)
@@ -96,44 +131,56 @@ class Event:
         ), (
             f"Length mismatch: {len(self.full_words)}, {len(self.timestamps)}, {len(self.states)}, {len(self.sample_numbers)}"
         )
-        return len(self.full_words)
+
+    def __len__(self):
+        return self.full_words.shape[0]
+
+    def timestamps_ns(self) -> np.ndarray:
+        """Return the times of the sample numbers in int64 nanoseconds.
+
+        These are computed from sample_numbers and the sample rate, so unlike
+        timestamps they are not synchronized to other streams.
+        """
+        return _sample_numbers_to_ns(self.sample_numbers, self.metadata.sample_rate)
 
     @staticmethod
-    def from_folder(full_event_folder_path: str | Path, metadata: EventMetadata):
+    def from_folder(
+        full_event_folder_path: str | Path, metadata: EventMetadata, mmap: bool = True
+    ):
+        """Load event arrays from an event folder.
+
+        By default the arrays are memory-mapped read-only, so only the parts
+        that are accessed are read from disk. Use mmap=False for writeable
+        in-memory arrays.
+        """
+        mmap_mode = "r" if mmap else None
         return Event(
             metadata=metadata,
-            full_words=np.load(os.path.join(full_event_folder_path, "full_words.npy")),
-            timestamps=np.load(os.path.join(full_event_folder_path, "timestamps.npy")),
-            states=np.load(os.path.join(full_event_folder_path, "states.npy")),
+            full_words=np.load(
+                os.path.join(full_event_folder_path, "full_words.npy"),
+                mmap_mode=mmap_mode,
+            ),
+            timestamps=np.load(
+                os.path.join(full_event_folder_path, "timestamps.npy"),
+                mmap_mode=mmap_mode,
+            ),
+            states=np.load(
+                os.path.join(full_event_folder_path, "states.npy"), mmap_mode=mmap_mode
+            ),
             sample_numbers=np.load(
-                os.path.join(full_event_folder_path, "sample_numbers.npy")
+                os.path.join(full_event_folder_path, "sample_numbers.npy"),
+                mmap_mode=mmap_mode,
             ),
         )
 
-    def __init__(
-        self, metadata: EventMetadata, full_words, timestamps, states, sample_numbers
-    ):
-        # verify all args have same length
-        assert (
-            len(full_words) == len(timestamps) == len(states) == len(sample_numbers)
-        ), (
-            f"Length mismatch: {len(full_words)}, {len(timestamps)}, {len(states)}, {len(sample_numbers)}"
-        )
-        self.metadata = metadata
-        self.full_words = full_words
-        self.timestamps = timestamps
-        self.states = states
-        self.sample_numbers = sample_numbers
-
     def __str__(self):
-        metadata_str = pprint.pformat(self.metadata)
         return (
             f"Event Data: {self.metadata.folder_name}')\n"
             f"├─── Full Words: {self.full_words.shape}\n"
             f"├─── Timestamps: {self.timestamps.shape}\n"
             f"├─── States: {self.states.shape}\n"
             f"├─── Sample Numbers: {self.sample_numbers.shape}\n"
-            f"└─── {metadata_str}\n"
+            f"└─── {self.metadata!r}\n"
         )
 
 
@@ -144,13 +191,24 @@ class FullWordEvent:
     timestamps: np.ndarray
     sample_numbers: np.ndarray
 
-    def __len__(self):
+    def __post_init__(self):
+        # verify all arrays have same length
         assert (
             len(self.full_words) == len(self.timestamps) == len(self.sample_numbers)
         ), (
             f"Length mismatch: {len(self.full_words)}, {len(self.timestamps)}, {len(self.sample_numbers)}"
         )
-        return len(self.full_words)
+
+    def __len__(self):
+        return self.full_words.shape[0]
+
+    def timestamps_ns(self) -> np.ndarray:
+        """Return the times of the sample numbers in int64 nanoseconds.
+
+        These are computed from sample_numbers and the sample rate, so unlike
+        timestamps they are not synchronized to other streams.
+        """
+        return _sample_numbers_to_ns(self.sample_numbers, self.metadata.sample_rate)
 
 
 def remove_repeating_simultaneous_words(event: Event) -> FullWordEvent:
@@ -163,17 +221,33 @@ def remove_repeating_simultaneous_words(event: Event) -> FullWordEvent:
 
     """
 
-    # TODO: This does not work. Write a test that verifies it does.
-    unique_indices = np.where(np.diff(event.full_words, prepend=np.nan) != 0)[0]
+    full_words = event.full_words
+    is_new_word = np.empty(full_words.shape[0], dtype=bool)
+    is_new_word[:1] = True
+    np.not_equal(full_words[1:], full_words[:-1], out=is_new_word[1:])
+
+    unique_indices = np.flatnonzero(is_new_word)
 
+    # indexing reads only the selected entries of memory-mapped arrays
     return FullWordEvent(
         metadata=event.metadata,
-        full_words=event.full_words[unique_indices],
-        timestamps=event.timestamps[unique_indices],
-        sample_numbers=event.sample_numbers[unique_indices],
+        full_words=np.asarray(full_words[unique_indices]),
+        timestamps=np.asarray(event.timestamps[unique_indices]),
+        sample_numbers=np.asarray(event.sample_numbers[unique_indices]),
     )
 
 
+source_processor_loader_map: dict[
+    str, Callable[[Path, EventMetadata], Event | Messages | FullWordEvent]
+] = {
+    "Network Events": lambda path, metadata: remove_repeating_simultaneous_words(
+        Event.from_folder(path, metadata)
+    ),
+    "Message Center": Messages.from_folder,
+    "NI-DAQmx": Event.from_folder,
+}
+
+
 def event_from_eventfolder(
     recording_directory: str | Path, metadata: EventMetadata
 ) -> Event | Messages | FullWordEvent:
@@ -187,20 +261,13 @@ def event_from_eventfolder(
     )
 
     # return data based on metadata.source_processor
-    match metadata.source_processor:
-        case "Network Events":
-            return remove_repeating_simultaneous_words(
-                Event.from_folder(full_event_folder_path, metadata)
-            )
-        case "Message Center":
-            return Messages.from_folder(full_event_folder_path, metadata)
-        case "NI-DAQmx":
-            return Event.from_folder(full_event_folder_path, metadata)
-        case _:
-            warnings.warn(
-                f"Unsupported source processor: {metadata.source_processor}. Attempting generic Event loading..."
-            )
-            return Event.from_folder(full_event_folder_path, metadata)
+    loader = source_processor_loader_map.get(metadata.source_processor)
+    if loader is None:
+        warnings.warn(
+            f"Unsupported source processor: {metadata.source_processor}. Attempting generic Event loading..."
+        )
+        loader = Event.from_folder
+    return loader(full_event_folder_path, metadata)
 
 
 def find_ev02_source(oeinfo: dict):
@@ -220,13 +287,97 @@ def find_marker_source(oeinfo: dict):
             return EventMetadata(**event)
 
 
+def _seconds_to_ns(timestamps: np.ndarray, block_size: int = 1 << 20) -> np.ndarray:
+    """Convert timestamps in seconds to rounded int64 nanoseconds.
+
+    The conversion runs block by block through one reusable float64 buffer,
+    so (memory-mapped) timestamps are streamed into the int64 result without
+    a full-size float64 temporary.
+    """
+    n_timestamps = len(timestamps)
+    timestamps_ns = np.empty(n_timestamps, dtype=np.int64)
+    buffer = np.empty(min(n_timestamps, block_size), dtype=np.float64)
+    for start in range(0, n_timestamps, block_size):
+        stop = min(start + block_size, n_timestamps)
+        block = buffer[: stop - start]
+        np.multiply(timestamps[start:stop], 1e9, out=block)
+        np.rint(block, out=block)
+        timestamps_ns[start:stop] = block
+    return timestamps_ns
+
+
+def _is_sorted(values: np.ndarray) -> bool:
+    return bool(np.all(values[1:] >= values[:-1]))
+
+
+def _merge_sorted_events(
+    timestamps_ns_a: np.ndarray,
+    event_codes_a: np.ndarray,
+    timestamps_ns_b: np.ndarray,
+    event_codes_b: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Merge two event sources whose timestamps are sorted each.
+
+    Runs in linear time instead of sorting the concatenated events. Events of
+    source a come first for equal timestamps, as with a stable sort.
+    """
+    n_events = len(timestamps_ns_a) + len(timestamps_ns_b)
+    positions_b = np.searchsorted(timestamps_ns_a, timestamps_ns_b, side="right")
+    positions_b += np.arange(len(timestamps_ns_b))
+    is_from_a = np.ones(n_events, dtype=bool)
+    is_from_a[positions_b] = False
+
+    timestamps_ns = np.empty(n_events, dtype=np.int64)
+    timestamps_ns[is_from_a] = timestamps_ns_a
+    timestamps_ns[positions_b] = timestamps_ns_b
+
+    event_codes = np.empty(n_events, dtype=np.int32)
+    event_codes[is_from_a] = event_codes_a
+    event_codes[positions_b] = event_codes_b
+
+    return timestamps_ns, event_codes
+
+
+def _merge_events(
+    timestamps_ns_parts: list[np.ndarray], event_codes_parts: list[np.ndarray]
+) -> tuple[np.ndarray, np.ndarray]:
+    """Merge the events of all sources ordered by timestamp.
+
+    Sources are merged pairwise if all of them are sorted already, otherwise
+    the concatenated events are sorted. Either way, events with equal
+    timestamps keep the order of their sources.
+    """
+    timestamps_ns = np.array([], dtype=np.int64)
+    event_codes = np.array([], dtype=np.int32)
+    if all(_is_sorted(part) for part in timestamps_ns_parts):
+        for part_timestamps_ns, part_event_codes in zip(
+            timestamps_ns_parts, event_codes_parts
+        ):
+            timestamps_ns, event_codes = _merge_sorted_events(
+                timestamps_ns, event_codes, part_timestamps_ns, part_event_codes
+            )
+    else:
+        logger.debug("Event timestamps are not sorted, sorting merged events")
+        timestamps_ns = np.concatenate([timestamps_ns, *timestamps_ns_parts]).astype(
+            np.int64, copy=False
+        )
+        event_codes = np.concatenate([event_codes, *event_codes_parts]).astype(
+            np.int32, copy=False
+        )
+        sort_indices = np.argsort(timestamps_ns, kind="stable")
+        timestamps_ns = timestamps_ns[sort_indices]
+        event_codes = event_codes[sort_indices]
+
+    return timestamps_ns, event_codes
+
+
 def process_oe_events(
     event_config: EventPreprocessingConfig, recording: Recording, dh5file: DH5File
 ):
     logger.info(f"Processing events in {dh5file.file.filename}")
 
-    timestamps_ns = np.array([], dtype=np.int64)
-    event_codes = np.array([], dtype=np.int32)
+    timestamps_ns_parts: list[np.ndarray] = []
+    event_codes_parts: list[np.ndarray] = []
 
     assert isinstance(recording, BinaryRecording), (
         "Recording must be a BinaryRecording to process events."
@@ -244,10 +395,8 @@ def process_oe_events(
         )
         assert isinstance(network_events_words, Event)
 
-        timestamps_ns = np.array(
-            np.int64(np.round(network_events_words.timestamps * 1e9)), dtype=np.int64
-        )
-        event_codes = network_events_words.states
+        timestamps_ns_parts.append(_seconds_to_ns(network_events_words.timestamps))
+        event_codes_parts.append(network_events_words.states)
 
     # Network Events
     network_events_source = find_marker_source(recording.info)
@@ -262,20 +411,14 @@ def process_oe_events(
         )
         assert isinstance(network_events_words, FullWordEvent)
 
-        # append to timesatamps_ns and event_codes
-        timestamps_ns = np.concatenate(
-            (timestamps_ns, np.int64(np.round(network_events_words.timestamps * 1e9)))
-        ).astype(np.int64)
-        event_codes = np.concatenate(
-            (event_codes, network_events_words.full_words + network_events_offset)
-        ).astype(np.int32)
-
-    # sort event_codes and timesamps_ns according to timestamps_ns
-    sort_indices = np.argsort(timestamps_ns)
-    timestamps_ns = timestamps_ns[sort_indices]
-    event_codes = event_codes[sort_indices]
+        timestamps_ns_parts.append(_seconds_to_ns(network_events_words.timestamps))
+        event_codes_parts.append(
+            network_events_words.full_words + network_events_offset
+        )
 
-    assert all(np.diff(timestamps_ns) >= 0)
+    # merge all sources according to timestamps_ns
+    timestamps_ns, event_codes = _merge_events(timestamps_ns_parts, event_codes_parts)
+    assert _is_sorted(timestamps_ns)
 
     dh5io.event_triggers.add_event_triggers_to_file(
         dh5file.file, timestamps_ns=timestamps_ns, event_codes=event_codes
@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 import oecon.default_mappings as default
 from open_ephys.analysis.recording import Continuous
@@ -5,8 +6,14 @@ from open_ephys.analysis.recording import Recording
 from open_ephys.analysis.recording import ContinuousMetadata
 from dh5io import DH5File
 import dh5io
-from dhspec.cont import create_empty_index_array, create_channel_info
-from dh5io.cont import create_cont_group_from_data_in_file
+from dhspec.cont import (
+    CHANNELS_DTYPE,
+    DATA_DATASET_NAME,
+    INDEX_DATASET_NAME,
+    create_empty_index_array,
+)
+from dh5io.cont import create_empty_cont_group_in_file
+import h5py
 import numpy as np
 
 
@@ -20,6 +27,139 @@ class RawConfig:
         default_factory=lambda: default.DEFAULT_OE_STREAM_MAPPING.copy()
     )
     included_channel_names: list[str] | None = None  # None for all
+    # HDF5 storage of the DATA datasets: chunks span chunk_samples samples of
+    # a single channel, compression is any h5py filter name or None.
+    # compression_opts is the gzip level (None for the h5py default of 4)
+    chunk_samples: int = 65536
+    compression: str | None = "gzip"
+    compression_opts: int | None = None
+    shuffle: bool = True
+
+    def __post_init__(self):
+        if self.compression_opts is not None and self.compression != "gzip":
+            raise ValueError(
+                f"compression_opts={self.compression_opts} is only supported for gzip compression, not {self.compression}."
+            )
+
+
+def _create_chunked_cont_group(
+    file: h5py.File,
+    cont_group_id: int,
+    nSamples: int,
+    nChannels: int,
+    chunks: tuple[int, int],
+    compression: str | None,
+    compression_opts: int | None,
+    shuffle: bool,
+    sample_period_ns: np.int32,
+    calibration: np.ndarray,
+    channels: np.ndarray,
+    name: str,
+) -> h5py.Dataset:
+    """Create an empty CONT group and return its chunked DATA dataset.
+
+    dh5io always creates DATA with a contiguous layout. As nothing has been
+    written to it yet, no storage is allocated and it can be replaced by a
+    chunked (and optionally compressed) dataset of the same shape.
+    """
+    cont_group = create_empty_cont_group_in_file(
+        file,
+        cont_group_id,
+        nSamples=nSamples,
+        nChannels=nChannels,
+        sample_period_ns=sample_period_ns,
+        n_index_items=1,
+        calibration=calibration,
+        channels=channels,
+        name=name,
+    )
+    cont_group[INDEX_DATASET_NAME][:] = create_empty_index_array(n_index_items=1)
+
+    # HDF5 does not allow chunks larger than an empty dataset
+    if nSamples == 0:
+        return cont_group[DATA_DATASET_NAME]
+
+    del cont_group[DATA_DATASET_NAME]
+    return cont_group.create_dataset(
+        DATA_DATASET_NAME,
+        shape=(nSamples, nChannels),
+        dtype=np.int16,
+        chunks=chunks,
+        compression=compression,
+        compression_opts=compression_opts,
+        shuffle=shuffle,
+    )
+
+
+def _included_channel_indices(
+    channel_names: list[str], included_channel_names: list[str] | None
+) -> list[int]:
+    return [
+        channel_index
+        for channel_index, name in enumerate(channel_names)
+        if included_channel_names is None or name in included_channel_names
+    ]
+
+
+def _create_channel_infos(
+    first_global_channel_index: int, channel_indices: list[int]
+) -> np.ndarray:
+    """Create the channel infos for the given OE channels as one array.
+
+    Global channel numbers are assigned consecutively starting at
+    first_global_channel_index.
+    """
+    nChannels = len(channel_indices)
+    channel_infos = np.empty(nChannels, dtype=CHANNELS_DTYPE)
+    channel_infos["GlobalChanNumber"] = np.arange(
+        first_global_channel_index, first_global_channel_index + nChannels
+    )
+    channel_infos["BoardChanNo"] = channel_indices
+    channel_infos["ADCBitWidth"] = 16
+    channel_infos["MaxVoltageRange"] = 10.0
+    channel_infos["MinVoltageRange"] = 10.0
+    channel_infos["AmplifChan0"] = 0
+    return channel_infos
+
+
+def _write_samples_in_blocks(
+    targets: list[tuple[h5py.Dataset, list[int] | slice]],
+    samples: np.ndarray,
+    block_samples: int,
+):
+    """Copy samples[:, channels] to data for all (data, channels) targets.
+
+    The samples are read in blocks of block_samples consecutive samples of all
+    channels, which is a contiguous read of the (memory-mapped) OE data. Each
+    block is read once and then distributed to all targets. Blocks match the
+    chunk length of the datasets, so every chunk is written completely in one
+    go.
+
+    HDF5 serializes all writes to a file, so instead of writing several
+    streams in parallel, the next block is read from disk in a worker thread
+    while the current block is written.
+    """
+    nSamples = samples.shape[0]
+    if nSamples == 0 or len(targets) == 0:
+        return
+
+    def read_block(start: int) -> np.ndarray:
+        return np.array(samples[start : start + block_samples])
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        next_block = executor.submit(read_block, 0)
+        for start in range(0, nSamples, block_samples):
+            block = next_block.result()
+            if start + block_samples < nSamples:
+                next_block = executor.submit(read_block, start + block_samples)
+
+            # write_direct selects the channels in HDF5 instead of copying
+            # each channel into a temporary contiguous array first
+            stop = start + block.shape[0]
+            for data, channels in targets:
+                data.write_direct(
+                    block, source_sel=np.s_[:, channels], dest_sel=np.s_[start:stop]
+                )
 
 
 def _create_cont_group_per_channel(
@@ -29,40 +169,45 @@ def _create_cont_group_per_channel(
     start_cont_id: int,
     first_global_channel_index: int,
     included_channel_names: list[str] | None = None,
+    chunk_samples: int = RawConfig.chunk_samples,
+    compression: str | None = RawConfig.compression,
+    compression_opts: int | None = RawConfig.compression_opts,
+    shuffle: bool = RawConfig.shuffle,
 ):
-    global_channel_index = first_global_channel_index
-    index = create_empty_index_array(n_index_items=1)
+    nSamples = oe_continuous.samples.shape[0]
+    sample_period_ns = np.int32(round(1e9 / metadata.sample_rate))
+    targets: list[tuple[h5py.Dataset, list[int] | slice]] = []
 
     assert metadata.channel_names is not None, "Channel names are not set in OE data."
-    for channel_index, name in enumerate(metadata.channel_names):
-        if included_channel_names is not None and name not in included_channel_names:
-            continue
+    channel_indices = _included_channel_indices(
+        metadata.channel_names, included_channel_names
+    )
+    if len(channel_indices) == 0:
+        return
+    channel_infos = _create_channel_infos(first_global_channel_index, channel_indices)
 
+    for channel_index, channel_info in zip(channel_indices, channel_infos):
         dh5_cont_id = start_cont_id + channel_index
 
-        channel_info = create_channel_info(
-            GlobalChanNumber=global_channel_index,
-            BoardChanNo=channel_index,
-            ADCBitWidth=16,
-            MaxVoltageRange=10.0,
-            MinVoltageRange=10.0,
-            AmplifChan0=0,
-        )
-
-        data = oe_continuous.samples[:, channel_index : channel_index + 1]
-
-        create_cont_group_from_data_in_file(
+        data = _create_chunked_cont_group(
             file=dh5file.file,
             cont_group_id=dh5_cont_id,
-            data=data,
-            index=index,
-            sample_period_ns=np.int32(1.0 / metadata.sample_rate * 1e9),
-            name=name,
+            nSamples=nSamples,
+            nChannels=1,
+            chunks=(max(1, min(nSamples, chunk_samples)), 1),
+            compression=compression,
+            compression_opts=compression_opts,
+            shuffle=shuffle,
+            sample_period_ns=sample_period_ns,
+            name=metadata.channel_names[channel_index],
             channels=channel_info,
             calibration=np.array(metadata.bit_volts[channel_index]),
         )
+        targets.append((data, slice(channel_index, channel_index + 1)))
 
-        global_channel_index += 1
+    _write_samples_in_blocks(
+        targets, oe_continuous.samples, block_samples=max(1, chunk_samples)
+    )
 
 
 def _create_cont_group_per_continuous_stream(
@@ -70,38 +215,43 @@ def _create_cont_group_per_continuous_stream(
     dh5file: dh5io.DH5File,
     metadata: ContinuousMetadata,
     start_cont_id: int,
-    last_global_channel_index: int = 0,
+    first_global_channel_index: int = 0,
     included_channel_names: list[str] | None = None,
+    chunk_samples: int = RawConfig.chunk_samples,
+    compression: str | None = RawConfig.compression,
+    compression_opts: int | None = RawConfig.compression_opts,
+    shuffle: bool = RawConfig.shuffle,
 ):
-    raise NotImplementedError("Grouping channels into CONT blocks is not yet supported")
-
-    # create a CONT group for the entire continuous stream
-    dh5_cont_id = start_cont_id
-
-    # TODO: This should be an array of channel info objects, one for each channel
-    # but for now, we just create one channel info object for the entire stream
-    channel_info = dh5io.cont.create_channel_info(
-        GlobalChanNumber=last_global_channel_index,
-        BoardChanNo=0,
-        ADCBitWidth=16,
-        MaxVoltageRange=10.0,
-        MinVoltageRange=10.0,
-        AmplifChan0=0,
+    assert metadata.channel_names is not None, "Channel names are not set in OE data."
+    channel_indices = _included_channel_indices(
+        metadata.channel_names, included_channel_names
     )
+    if len(channel_indices) == 0:
+        return
 
-    # TODO: add streaming data if too large for memory
-    data = oe_continuous.samples
-    index = dh5io.cont.create_empty_index_array(1)
-
-    dh5io.cont.create_cont_group_from_data_in_file(
-        file=dh5file,
-        cont_group_id=dh5_cont_id,
-        data=data,
-        index=index,
-        sample_period_ns=np.int32(1.0 / metadata.sample_rate * 1e9),
+    # one CONT group for the entire stream, chunked per channel so that reading
+    # a single channel does not touch the data of all other channels
+    nSamples = oe_continuous.samples.shape[0]
+    data = _create_chunked_cont_group(
+        file=dh5file.file,
+        cont_group_id=start_cont_id,
+        nSamples=nSamples,
+        nChannels=len(channel_indices),
+        chunks=(max(1, min(nSamples, chunk_samples)), 1),
+        compression=compression,
+        compression_opts=compression_opts,
+        shuffle=shuffle,
+        sample_period_ns=np.int32(round(1e9 / metadata.sample_rate)),
+        calibration=np.asarray(metadata.bit_volts)[channel_indices],
+        channels=_create_channel_infos(first_global_channel_index, channel_indices),
         name=metadata.source_node_name,
-        channels=channel_info,
-        calibration=metadata.bit_volts,
+    )
+
+    all_channels = len(channel_indices) == oe_continuous.samples.shape[1]
+    _write_samples_in_blocks(
+        [(data, slice(None) if all_channels else channel_indices)],
+        oe_continuous.samples,
+        block_samples=max(1, chunk_samples),
     )
 
 
@@ -141,6 +291,10 @@ def process_oe_raw_data(
                 start_cont_id=start_cont_id,
                 first_global_channel_index=global_channel_index,
                 included_channel_names=config.included_channel_names,
+                chunk_samples=config.chunk_samples,
+                compression=config.compression,
+                compression_opts=config.compression_opts,
+                shuffle=config.shuffle,
             )
             global_channel_index += nChannels
         else:
@@ -149,8 +303,14 @@ def process_oe_raw_data(
                 dh5file=dh5file,
                 metadata=metadata,
                 start_cont_id=start_cont_id,
+                first_global_channel_index=global_channel_index,
                 included_channel_names=config.included_channel_names,
+                chunk_samples=config.chunk_samples,
+                compression=config.compression,
+                compression_opts=config.compression_opts,
+                shuffle=config.shuffle,
             )
+            global_channel_index += nChannels
 
     # update included channesl in config
     config.included_channel_names = included_channel_names
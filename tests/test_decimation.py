@@ -1,9 +1,9 @@
+import functools
+
 import pytest
 import numpy as np
-import tempfile
-import os
+import scipy.signal
 import h5py
-from unittest.mock import Mock, patch
 
 from oecon.decimation import decimate_raw_data, decimate_np_array, DecimationConfig
 from open_ephys.analysis.recording import Recording, Continuous, ContinuousMetadata
@@ -11,6 +11,14 @@ from dh5io.create import create_dh_file
 from dh5io.cont import validate_cont_group
 
 
+@functools.lru_cache(maxsize=16)
+def _time_vector(n_samples, sample_rate, dtype):
+    """Time vector in seconds, read-only because it is shared between calls"""
+    t = np.arange(n_samples, dtype=dtype) / dtype(sample_rate)
+    t.flags.writeable = False
+    return t
+
+
 def create_sinusoid_signal(
     n_samples,
     n_channels,
@@ -19,6 +27,8 @@ def create_sinusoid_signal(
     amplitudes=(1.0, 0.5),
     noise_std=0.1,
     seed=42,
+    dtype=np.float64,
+    writeable=False,
 ):
     """Create test signal with two sinusoids and noise.
 
@@ -30,35 +40,66 @@ def create_sinusoid_signal(
         amplitudes: Tuple of amplitudes for the two sinusoids
         noise_std: Standard deviation of additive Gaussian noise
         seed: Random seed for reproducible noise
-
+        dtype: Floating point type of the signal and time vector
+        writeable: Return a writeable copy per channel instead of a read-only view
 
     """
-    np.random.seed(seed)
-
     # Create time vector
-    t = np.arange(n_samples) / sample_rate
+    t = _time_vector(n_samples, sample_rate, dtype)
+
+    # Evaluate all sinusoids in one call and sum them weighted by amplitude
+    phases = dtype(2 * np.pi) * np.outer(t, np.asarray(frequencies, dtype=dtype))
+    signal = np.sin(phases, out=phases) @ np.asarray(amplitudes, dtype=dtype)
+
+    # Add noise from a local generator instead of the global random state,
+    # scaling and adding in place to avoid temporary arrays
+    if noise_std:
+        rng = np.random.default_rng(seed)
+        noise = rng.standard_normal(n_samples, dtype=dtype)
+        noise *= noise_std
+        signal += noise
+
+    if writeable:
+        # One contiguous copy for callers that modify channels in place
+        test_samples = np.repeat(signal[:, None], n_channels, axis=1)
+    else:
+        # Replicate across channels as a read-only view without copying
+        test_samples = np.broadcast_to(signal[:, None], (n_samples, n_channels))
+
+    return test_samples, t
 
-    # Create the two sinusoids
-    sin1 = amplitudes[0] * np.sin(2 * np.pi * frequencies[0] * t)
-    sin2 = amplitudes[1] * np.sin(2 * np.pi * frequencies[1] * t)
 
-    # Combine sinusoids
-    signal = sin1 + sin2
+@pytest.fixture(scope="session")
+def sinusoid_cache():
+    return {}
 
-    # Add noise
-    noise = noise_std * np.random.randn(n_samples)
-    signal_with_noise = signal + noise
 
-    # Replicate across channels
-    test_samples = np.column_stack([signal_with_noise] * n_channels)
+@pytest.fixture
+def make_sinusoid(sinusoid_cache):
+    """Return create_sinusoid_signal with results cached for the whole session.
 
-    return test_samples, t
+    The cached arrays are shared between tests and therefore read-only.
+    """
+
+    def _make(**kwargs):
+        key = tuple(sorted(kwargs.items()))
+        if key not in sinusoid_cache:
+            test_samples, t = create_sinusoid_signal(**kwargs)
+            test_samples.flags.writeable = False
+            t.flags.writeable = False
+            sinusoid_cache[key] = (test_samples, t)
+        return sinusoid_cache[key]
+
+    return _make
 
 
 class MockContinuous(Continuous):
     def __init__(self, samples, metadata):
         self.samples = samples
         self.metadata = metadata
+        self._name_to_idx = {
+            name: idx for idx, name in enumerate(metadata.channel_names or [])
+        }
 
     def get_samples(
         self,
@@ -67,11 +108,12 @@ class MockContinuous(Continuous):
         selected_channels=None,
         selected_channel_names=None,
     ):
-        if selected_channel_names and self.metadata.channel_names:
-            # Find the index of the selected channel
-            channel_idx = self.metadata.channel_names.index(selected_channel_names[0])
-            # Return samples for that channel (reshape to column vector)
-            return self.samples[:, channel_idx : channel_idx + 1]
+        if selected_channel_names and self._name_to_idx:
+            # Find the indices of the selected channels
+            channel_indices = [
+                self._name_to_idx[name] for name in selected_channel_names
+            ]
+            return self.samples[:, channel_indices]
         return self.samples
 
 
@@ -143,16 +185,17 @@ class MockRecording(Recording):
 class TestDecimateNpArray:
     """Tests for the decimate_np_array function"""
 
-    def test_decimate_np_array_basic(self):
+    def test_decimate_np_array_basic(self, make_sinusoid):
         """Test basic decimation functionality"""
         # Create test data with sinusoids and noise
-        data, t = create_sinusoid_signal(
+        data, t = make_sinusoid(
             n_samples=1000,
             n_channels=2,
             frequencies=(10, 40),
             amplitudes=(1.0, 0.5),
             noise_std=0.1,
             seed=42,
+            dtype=np.float32,
         )
 
         # Test decimation
@@ -168,64 +211,111 @@ class TestDecimateNpArray:
         # Check that output is decimated
         assert result.shape[0] == data.shape[0] // 10
         assert result.shape[1] == data.shape[1]
+        assert result.dtype == np.float32
 
-    def test_decimate_np_array_different_factors(self):
+    def test_decimate_np_array_zero_phase_matches_filtfilt(self, make_sinusoid):
+        """Test that the resample_poly path agrees with filtfilt and slicing"""
+        data, t = make_sinusoid(
+            n_samples=1000,
+            n_channels=2,
+            frequencies=(10, 40),
+            amplitudes=(1.0, 0.5),
+            noise_std=0.0,
+        )
+
+        result = decimate_np_array(
+            data=data,
+            downsampling_factor=10,
+            filter_order=30,
+            filter_type="fir",
+            axis=0,
+            zero_phase=True,
+        )
+
+        b = scipy.signal.firwin(31, 1.0 / 10, window="hamming")
+        reference = scipy.signal.filtfilt(b, 1.0, data, axis=0)[::10]
+
+        # both are zero-phase; they only differ in edge handling and in
+        # filtfilt applying the filter twice
+        edge = 5
+        np.testing.assert_allclose(result[edge:-edge], reference[edge:-edge], atol=1e-3)
+
+    @pytest.mark.parametrize("factor", [2, 5, 10, 20])
+    def test_decimate_np_array_different_factors(self, factor, make_sinusoid):
         """Test decimation with different downsampling factors"""
-        data, t = create_sinusoid_signal(
+        data, t = make_sinusoid(
             n_samples=1000,
             n_channels=1,
             frequencies=(15, 35),
             amplitudes=(1.2, 0.3),
             noise_std=0.05,
             seed=42,
+            dtype=np.float32,
         )
 
-        for factor in [2, 5, 10, 20]:
-            result = decimate_np_array(
-                data=data,
-                downsampling_factor=factor,
-                filter_order=10,
-                filter_type="fir",
-                axis=0,
-                zero_phase=True,
-            )
-            expected_length = data.shape[0] // factor
-            assert result.shape[0] == expected_length
+        result = decimate_np_array(
+            data=data,
+            downsampling_factor=factor,
+            filter_order=10,
+            filter_type="fir",
+            axis=0,
+            zero_phase=True,
+        )
+        expected_length = data.shape[0] // factor
+        assert result.shape[0] == expected_length
 
-    def test_decimate_np_array_filter_types(self):
+    @pytest.mark.parametrize("ftype", ["fir", "iir"])
+    def test_decimate_np_array_filter_types(self, ftype, make_sinusoid):
         """Test decimation with different filter types"""
-        data, t = create_sinusoid_signal(
+        data, t = make_sinusoid(
             n_samples=500,
             n_channels=1,
             frequencies=(12, 48),
             amplitudes=(0.8, 0.4),
             noise_std=0.08,
             seed=42,
+            dtype=np.float32,
         )
 
-        for ftype in ["fir", "iir"]:
-            result = decimate_np_array(
-                data=data,
-                downsampling_factor=5,
-                filter_order=20,
-                filter_type=ftype,
-                axis=0,
-                zero_phase=True,
-            )
-            assert result.shape[0] == data.shape[0] // 5
+        result = decimate_np_array(
+            data=data,
+            downsampling_factor=5,
+            filter_order=20,
+            filter_type=ftype,
+            axis=0,
+            zero_phase=True,
+        )
+        assert result.shape[0] == data.shape[0] // 5
 
 
-def test_decimation_config_with_real_dh5file(plt):
-    """Test DecimationConfig integration with a real temporary DH5File"""
-    # Create a temporary file for the DH5 file
-    with tempfile.NamedTemporaryFile(suffix=".dh5", delete=False) as temp_file:
-        temp_path = temp_file.name
+@pytest.mark.benchmark(group="decimate")
+@pytest.mark.parametrize("ftype", ["fir", "iir"])
+@pytest.mark.parametrize("factor", [2, 5, 13])
+def test_benchmark_decimate_np_array(factor, ftype, make_sinusoid, benchmark):
+    """Benchmark decimate_np_array on a long signal"""
+    data, t = make_sinusoid(n_samples=1_000_000, n_channels=1)
+
+    result = benchmark(
+        decimate_np_array,
+        data=data,
+        downsampling_factor=factor,
+        filter_order=30,
+        filter_type=ftype,
+        axis=0,
+        zero_phase=True,
+    )
+
+    assert result.shape == (-(-data.shape[0] // factor), 1)
 
-    # Create a real DH5File using create_dh_file
-    dh5file = create_dh_file(temp_path, overwrite=True, validate=True)
+
+def test_decimation_config_with_real_dh5file(tmp_path, plt, make_sinusoid, request):
+    """Test DecimationConfig integration with a real temporary DH5File"""
+    # Create a real DH5File in the temporary directory managed by pytest
+    temp_path = tmp_path / "test.dh5"
+    dh5file = create_dh_file(str(temp_path), overwrite=True, validate=True)
 
     # Create test data with two sinusoids and noise
-    test_samples, t = create_sinusoid_signal(
+    test_samples, t = make_sinusoid(
         n_samples=30000,
         n_channels=2,
         sample_rate=30000,
@@ -287,67 +377,118 @@ def test_decimation_config_with_real_dh5file(plt):
     assert data.mean() < 0.1
     assert data.max() <= 6.0
 
+    # plt is a no-op mock without --plots (pytest-plt), skip preparing the data
+    if not request.config.getoption("plots"):
+        return
+
     t_decimated = np.arange(0, expected_decimated_length) / (
         metadata.sample_rate / config.downsampling_factor
     )
     plt.plot(t_decimated, cont_ch1.calibrated_data, "o-")
     plt.plot(t, test_samples[:, 0], ".")
 
-    del dh5file
 
-    if os.path.exists(temp_path):
-        os.unlink(temp_path)
+class FakeDh5File:
+    """Stand-in for DH5File, the patched dh5io functions never access the file"""
+
+    def __init__(self):
+        self.file = object()
+
+
+@pytest.fixture
+def patched_dh(monkeypatch):
+    """Replace the dh5io/dhspec functions used by decimate_raw_data.
+
+    Returns a dict with the keyword arguments of every recorded call.
+    """
+    calls = {"create_cont_group": [], "add_operation": [], "create_channel_info": []}
+
+    def record(name, return_value=None):
+        def fake(*args, **kwargs):
+            calls[name].append(kwargs)
+            return return_value
+
+        return fake
+
+    monkeypatch.setattr(
+        "dh5io.cont.create_cont_group_from_data_in_file", record("create_cont_group")
+    )
+    monkeypatch.setattr(
+        "dh5io.operations.add_operation_to_file", record("add_operation")
+    )
+    monkeypatch.setattr(
+        "dhspec.cont.create_channel_info",
+        record("create_channel_info", return_value={"test": "channel_info"}),
+    )
+    monkeypatch.setattr("dhspec.cont.create_empty_index_array", lambda n: np.array([0]))
+    monkeypatch.setattr("oecon.version.get_version_from_pyproject", lambda: "1.0.0")
+    return calls
+
+
+# decimate_raw_data does not modify the recording, so these recordings are
+# built once and shared by the integration tests
+@pytest.fixture(scope="module")
+def two_channel_recording():
+    """Recording with one stream of two identical channels"""
+    test_samples, _ = create_sinusoid_signal(
+        n_samples=1000,
+        n_channels=2,
+        frequencies=(20, 100),
+        amplitudes=(1.5, 0.8),
+        noise_std=0.3,
+        seed=42,
+    )
+    metadata = ContinuousMetadata(
+        channel_names=["CH1", "CH2"],
+        sample_rate=30000,
+        source_node_name="test_node",
+        source_node_id=100,
+        stream_name="test_stream",
+        num_channels=2,
+        bit_volts=[0.05, 0.05],
+    )
+    return MockRecording([MockContinuous(samples=test_samples, metadata=metadata)])
+
+
+@pytest.fixture(scope="module")
+def three_channel_recording():
+    """Recording with one stream of three channels of different amplitude"""
+    test_samples, _ = create_sinusoid_signal(
+        n_samples=1000,
+        n_channels=3,
+        frequencies=(15, 60),
+        amplitudes=(1.0, 0.6),
+        noise_std=0.2,
+        seed=42,
+        writeable=True,
+    )
+    test_samples *= np.array([1.0, 2.0, 3.0])
+    test_samples.flags.writeable = False
+    metadata = ContinuousMetadata(
+        channel_names=["CH1", "CH2", "CH3"],
+        sample_rate=30000,
+        source_node_name="test_node",
+        source_node_id=100,
+        stream_name="test_stream",
+        num_channels=3,
+        bit_volts=[0.05, 0.05, 0.05],
+    )
+    return MockRecording([MockContinuous(samples=test_samples, metadata=metadata)])
 
 
 class TestDecimateRawDataIntegration:
     """Integration tests for decimate_raw_data function"""
 
-    @patch("dhspec.cont.create_channel_info")
-    @patch("dh5io.cont.create_cont_group_from_data_in_file")
-    @patch("dh5io.operations.add_operation_to_file")
-    @patch("dhspec.cont.create_empty_index_array")
-    @patch("oecon.version.get_version_from_pyproject")
     def test_decimate_raw_data_basic(
         self,
-        mock_version,
-        mock_index_array,
-        mock_add_operation,
-        mock_create_cont_group,
-        mock_channel_info,
+        patched_dh,
+        two_channel_recording,
     ):
         """Test basic functionality of decimate_raw_data"""
-        # Setup mocks
-        mock_version.return_value = "1.0.0"
-        mock_index_array.return_value = np.array([0])
-        mock_channel_info.return_value = {"test": "channel_info"}
-
-        # Create test data with two sinusoids and noise
-        test_samples, t = create_sinusoid_signal(
-            n_samples=1000,
-            n_channels=2,
-            frequencies=(20, 100),
-            amplitudes=(1.5, 0.8),
-            noise_std=0.3,
-            seed=42,
-        )
-
-        # Create mock metadata and continuous data
-        metadata = ContinuousMetadata(
-            channel_names=["CH1", "CH2"],
-            sample_rate=30000,
-            source_node_name="test_node",
-            source_node_id=100,
-            stream_name="test_stream",
-            num_channels=2,
-            bit_volts=[0.05, 0.05],
-        )
+        recording = two_channel_recording
 
-        continuous = MockContinuous(samples=test_samples, metadata=metadata)
-        recording = MockRecording([continuous])
-
-        # Create mock DH5File
-        mock_dh5file = Mock()
-        mock_dh5file.file = Mock()
+        # Create fake DH5File
+        dh5file = FakeDh5File()
 
         # Create config
         config = DecimationConfig(
@@ -359,64 +500,83 @@ class TestDecimateRawDataIntegration:
         )
 
         # Call the function
-        result_config = decimate_raw_data(config, recording, mock_dh5file)
+        result_config = decimate_raw_data(config, recording, dh5file)
 
         # Verify results
         assert result_config.included_channel_names == ["CH1", "CH2"]
 
         # Verify that the DH5 operations were called for each channel
-        assert mock_create_cont_group.call_count == 2  # One for each channel
-        assert mock_add_operation.call_count == 1
+        assert len(patched_dh["create_cont_group"]) == 2  # One for each channel
+        assert len(patched_dh["add_operation"]) == 1
 
         # Verify channel info creation
-        assert mock_channel_info.call_count == 2
+        assert len(patched_dh["create_channel_info"]) == 2
 
-    @patch("dhspec.cont.create_channel_info")
-    @patch("dh5io.cont.create_cont_group_from_data_in_file")
-    @patch("dh5io.operations.add_operation_to_file")
-    @patch("dhspec.cont.create_empty_index_array")
-    @patch("oecon.version.get_version_from_pyproject")
-    def test_decimate_raw_data_channel_selection(
+    @pytest.mark.parametrize(
+        # 1000 float64 samples take 8000 bytes per channel
+        "max_batch_bytes, expected_batches",
+        [(1, 3), (8000, 3), (16000, 2), (23999, 2), (24000, 1)],
+    )
+    def test_decimate_raw_data_batches_channels(
         self,
-        mock_version,
-        mock_index_array,
-        mock_add_operation,
-        mock_create_cont_group,
-        mock_channel_info,
+        max_batch_bytes,
+        expected_batches,
+        patched_dh,
+        three_channel_recording,
+        monkeypatch,
     ):
-        """Test decimate_raw_data with specific channel selection"""
-        # Setup mocks
-        mock_version.return_value = "1.0.0"
-        mock_index_array.return_value = np.array([0])
-        mock_channel_info.return_value = {"test": "channel_info"}
+        """Test that channels are decimated in batches and written one by one"""
+        decimate_calls = []
 
-        # Create test data with two sinusoids and noise
-        test_samples, t = create_sinusoid_signal(
-            n_samples=500,
-            n_channels=3,
-            frequencies=(15, 60),
-            amplitudes=(1.0, 0.6),
-            noise_std=0.2,
-            seed=42,
+        def counting_decimate_np_array(**kwargs):
+            decimate_calls.append(kwargs["data"].shape)
+            return decimate_np_array(**kwargs)
+
+        monkeypatch.setattr(
+            "oecon.decimation.decimate_np_array", counting_decimate_np_array
         )
 
-        # Create mock metadata and continuous data
-        metadata = ContinuousMetadata(
-            channel_names=["CH1", "CH2", "CH3"],
-            sample_rate=30000,
-            source_node_name="test_node",
-            source_node_id=100,
-            stream_name="test_stream",
-            num_channels=3,
-            bit_volts=[0.05, 0.05, 0.05],
+        recording = three_channel_recording
+        test_samples = recording.continuous[0].samples
+
+        dh5file = FakeDh5File()
+
+        config = DecimationConfig(
+            downsampling_factor=10,
+            ftype="fir",
+            filter_order=30,
+            zero_phase=True,
+            max_batch_bytes=max_batch_bytes,
         )
 
-        continuous = MockContinuous(samples=test_samples, metadata=metadata)
-        recording = MockRecording([continuous])
+        decimate_raw_data(config, recording, dh5file)
+
+        assert len(decimate_calls) == expected_batches
+        assert len(patched_dh["create_cont_group"]) == 3
 
-        # Create mock DH5File
-        mock_dh5file = Mock()
-        mock_dh5file.file = Mock()
+        for channel_index, call_kwargs in enumerate(patched_dh["create_cont_group"]):
+            expected = decimate_np_array(
+                data=test_samples[:, channel_index : channel_index + 1],
+                downsampling_factor=10,
+                filter_order=30,
+                filter_type="fir",
+                axis=0,
+                zero_phase=True,
+            )
+            expected = (expected / 0.05).astype(np.int16)
+            np.testing.assert_array_equal(call_kwargs["data"], expected)
+            assert call_kwargs["cont_group_id"] == config.start_block_id + channel_index
+
+    def test_decimate_raw_data_channel_selection(
+        self,
+        patched_dh,
+        three_channel_recording,
+    ):
+        """Test decimate_raw_data with specific channel selection"""
+        recording = three_channel_recording
+
+        # Create fake DH5File
+        dh5file = FakeDh5File()
 
         # Create config with specific channel selection
         config = DecimationConfig(
@@ -426,14 +586,14 @@ class TestDecimateRawDataIntegration:
         )
 
         # Call the function
-        result_config = decimate_raw_data(config, recording, mock_dh5file)
+        result_config = decimate_raw_data(config, recording, dh5file)
 
         # Verify results
         assert result_config.included_channel_names == ["CH1", "CH3"]
 
         # Verify that the DH5 operations were called only for selected channels
-        assert mock_create_cont_group.call_count == 2  # Only CH1 and CH3
-        assert mock_add_operation.call_count == 1
+        assert len(patched_dh["create_cont_group"]) == 2  # Only CH1 and CH3
+        assert len(patched_dh["add_operation"]) == 1
 
     def test_decimate_raw_data_no_continuous_data(self):
         """Test decimate_raw_data raises assertion error when no continuous data"""
@@ -441,37 +601,24 @@ class TestDecimateRawDataIntegration:
         recording = MockRecording([])
         recording.continuous = None
 
-        # Create mock DH5File
-        mock_dh5file = Mock()
+        # Create fake DH5File
+        dh5file = FakeDh5File()
 
         # Create config
         config = DecimationConfig()
 
         # Should raise assertion error
         with pytest.raises(AssertionError, match="No continuous data found"):
-            decimate_raw_data(config, recording, mock_dh5file)
+            decimate_raw_data(config, recording, dh5file)
 
-    @patch("dhspec.cont.create_channel_info")
-    @patch("dh5io.cont.create_cont_group_from_data_in_file")
-    @patch("dh5io.operations.add_operation_to_file")
-    @patch("dhspec.cont.create_empty_index_array")
-    @patch("oecon.version.get_version_from_pyproject")
     def test_decimate_raw_data_multiple_continuous_streams(
         self,
-        mock_version,
-        mock_index_array,
-        mock_add_operation,
-        mock_create_cont_group,
-        mock_channel_info,
+        patched_dh,
+        make_sinusoid,
     ):
         """Test decimate_raw_data with multiple continuous streams"""
-        # Setup mocks
-        mock_version.return_value = "1.0.0"
-        mock_index_array.return_value = np.array([0])
-        mock_channel_info.return_value = {"test": "channel_info"}
-
         # Create test data for two streams with sinusoids and noise
-        test_samples1, t = create_sinusoid_signal(
+        test_samples1, t = make_sinusoid(
             n_samples=300,
             n_channels=2,
             frequencies=(25, 75),
@@ -479,7 +626,7 @@ class TestDecimateRawDataIntegration:
             noise_std=0.25,
             seed=42,
         )
-        test_samples2, t = create_sinusoid_signal(
+        test_samples2, t = make_sinusoid(
             n_samples=300,
             n_channels=1,
             frequencies=(30, 80),
@@ -515,19 +662,18 @@ class TestDecimateRawDataIntegration:
         # Create recording with multiple streams
         recording = MockRecording([continuous1, continuous2])
 
-        # Create mock DH5File
-        mock_dh5file = Mock()
-        mock_dh5file.file = Mock()
+        # Create fake DH5File
+        dh5file = FakeDh5File()
 
         # Create config
         config = DecimationConfig(downsampling_factor=3)
 
         # Call the function
-        result_config = decimate_raw_data(config, recording, mock_dh5file)
+        result_config = decimate_raw_data(config, recording, dh5file)
 
         # Verify results
         assert result_config.included_channel_names == ["A1", "A2", "B1"]
 
         # Verify that the DH5 operations were called for all channels across all streams
-        assert mock_create_cont_group.call_count == 3  # A1, A2, B1
-        assert mock_add_operation.call_count == 1
+        assert len(patched_dh["create_cont_group"]) == 3  # A1, A2, B1
+        assert len(patched_dh["add_operation"]) == 1
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from oecon.events import (
+    Event,
+    EventMetadata,
+    Messages,
+    remove_repeating_simultaneous_words,
+)
+
+
+def make_metadata(folder_name):
+    return EventMetadata(
+        folder_name=folder_name,
+        source_processor="Network Events",
+        stream_name="PXIe-6341",
+        identifier="",
+        sample_rate=30000.0,
+        channel_name="",
+        type="",
+        description="",
+    )
+
+
+@pytest.fixture
+def event_folder(tmp_path):
+    # full word 5 sets two bits, which are written as two entries
+    np.save(tmp_path / "full_words.npy", np.array([1, 5, 5, 4], dtype=np.int64))
+    np.save(tmp_path / "states.npy", np.array([1, 3, -1, 3], dtype=np.int64))
+    np.save(tmp_path / "timestamps.npy", np.array([0.1, 0.2, 0.2, 0.3]))
+    np.save(tmp_path / "sample_numbers.npy", np.array([3, 6, 6, 9], dtype=np.int64))
+    np.save(tmp_path / "text.npy", np.array([b"start", b"stop"]))
+    return tmp_path
+
+
+def arrays(data):
+    if isinstance(data, Messages):
+        return [data.text, data.sample_numbers, data.timestamps]
+    return [data.full_words, data.timestamps, data.states, data.sample_numbers]
+
+
+@pytest.mark.parametrize("cls", [Event, Messages])
+def test_from_folder_memory_maps_by_default(event_folder, cls):
+    data = cls.from_folder(event_folder, make_metadata(event_folder.name))
+
+    for array in arrays(data):
+        assert isinstance(array, np.memmap)
+        assert not array.flags.writeable
+
+
+@pytest.mark.parametrize("cls", [Event, Messages])
+def test_from_folder_without_mmap_loads_writeable_arrays(event_folder, cls):
+    data = cls.from_folder(event_folder, make_metadata(event_folder.name), mmap=False)
+
+    for array in arrays(data):
+        assert type(array) is np.ndarray
+        assert array.flags.writeable
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_remove_repeating_words_returns_plain_arrays(event_folder, mmap):
+    event = Event.from_folder(event_folder, make_metadata(event_folder.name), mmap)
+
+    full_word_event = remove_repeating_simultaneous_words(event)
+
+    assert np.array_equal(full_word_event.full_words, [1, 5, 4])
+    assert np.array_equal(full_word_event.sample_numbers, [3, 6, 9])
+    for array in [
+        full_word_event.full_words,
+        full_word_event.timestamps,
+        full_word_event.sample_numbers,
+    ]:
+        assert type(array) is np.ndarray
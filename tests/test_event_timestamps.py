@@ -0,0 +1,68 @@
+import numpy as np
+from oecon.events import Event, EventMetadata, _seconds_to_ns
+
+
+def make_event(sample_numbers, sample_rate):
+    n = len(sample_numbers)
+    return Event(
+        metadata=EventMetadata(
+            folder_name="test_folder",
+            source_processor="NI-DAQmx",
+            stream_name="PXIe-6341",
+            identifier="",
+            sample_rate=sample_rate,
+            channel_name="",
+            type="",
+            description="",
+        ),
+        full_words=np.zeros(n, dtype=np.int64),
+        timestamps=np.zeros(n),
+        states=np.zeros(n, dtype=np.int64),
+        sample_numbers=np.array(sample_numbers, dtype=np.int64),
+    )
+
+
+def test_timestamps_ns_is_exact_for_long_recordings():
+    # 3e9 samples at 30 kHz are about 28 hours
+    event = make_event([0, 1, 3, 30000, 3_000_000_000], sample_rate=30000.0)
+    timestamps_ns = event.timestamps_ns()
+    assert timestamps_ns.dtype == np.int64
+    assert np.array_equal(
+        timestamps_ns, np.array([0, 33333, 100000, 10**9, 10**14], dtype=np.int64)
+    )
+
+
+def test_timestamps_ns_rounds_to_nearest_nanosecond():
+    event = make_event([1, 2], sample_rate=30000.0)
+    assert np.array_equal(event.timestamps_ns(), np.array([33333, 66667]))
+
+
+def test_seconds_to_ns_matches_direct_conversion(tmp_path):
+    rng = np.random.default_rng(42)
+    timestamps = np.sort(rng.uniform(0, 36_000, size=2_500))
+    expected = np.round(timestamps * 1e9).astype(np.int64)
+
+    # block boundaries inside and at the end of the timestamps
+    for block_size in [1000, 2_500, 1 << 20]:
+        assert np.array_equal(_seconds_to_ns(timestamps, block_size), expected)
+
+    # memory-mapped timestamps as loaded by Event.from_folder
+    timestamps_path = tmp_path / "timestamps.npy"
+    np.save(timestamps_path, timestamps)
+    mapped_timestamps = np.load(timestamps_path, mmap_mode="r")
+    timestamps_ns = _seconds_to_ns(mapped_timestamps, block_size=1000)
+    assert timestamps_ns.dtype == np.int64
+    assert np.array_equal(timestamps_ns, expected)
+
+
+def test_seconds_to_ns_empty(tmp_path):
+    timestamps_path = tmp_path / "timestamps.npy"
+    np.save(timestamps_path, np.array([], dtype=np.float64))
+
+    for timestamps in [
+        np.array([], dtype=np.float64),
+        np.load(timestamps_path, mmap_mode="r"),
+    ]:
+        timestamps_ns = _seconds_to_ns(timestamps, block_size=1000)
+        assert timestamps_ns.shape == (0,)
+        assert timestamps_ns.dtype == np.int64
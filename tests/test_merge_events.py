@@ -0,0 +1,75 @@
+import numpy as np
+from oecon.events import _merge_events, _merge_sorted_events
+
+
+def test_merge_sorted_events_equal_timestamps_keep_source_order():
+    timestamps_ns, event_codes = _merge_sorted_events(
+        np.array([10, 20, 20, 30], dtype=np.int64),
+        np.array([1, 2, 3, 4], dtype=np.int32),
+        np.array([5, 20, 30, 40], dtype=np.int64),
+        np.array([101, 102, 103, 104], dtype=np.int32),
+    )
+
+    assert np.array_equal(timestamps_ns, [5, 10, 20, 20, 20, 30, 30, 40])
+    # events of the first source come first for equal timestamps
+    assert np.array_equal(event_codes, [101, 1, 2, 3, 102, 4, 103, 104])
+    assert timestamps_ns.dtype == np.int64
+    assert event_codes.dtype == np.int32
+
+
+def test_merge_sorted_events_with_empty_sources():
+    timestamps = np.array([1, 2, 3], dtype=np.int64)
+    codes = np.array([7, 8, 9], dtype=np.int64)
+    no_timestamps = np.array([], dtype=np.int64)
+    no_codes = np.array([], dtype=np.int32)
+
+    for merged_timestamps, merged_codes in [
+        _merge_sorted_events(no_timestamps, no_codes, timestamps, codes),
+        _merge_sorted_events(timestamps, codes, no_timestamps, no_codes),
+    ]:
+        assert np.array_equal(merged_timestamps, timestamps)
+        assert np.array_equal(merged_codes, codes)
+        assert merged_codes.dtype == np.int32
+
+    merged_timestamps, merged_codes = _merge_sorted_events(
+        no_timestamps, no_codes, no_timestamps, no_codes
+    )
+    assert merged_timestamps.shape == (0,)
+    assert merged_codes.shape == (0,)
+    assert merged_timestamps.dtype == np.int64
+    assert merged_codes.dtype == np.int32
+
+
+def test_merge_events_sorted_and_unsorted_sources_agree():
+    ttl_timestamps = np.array([10, 20, 20, 30], dtype=np.int64)
+    ttl_codes = np.array([1, 2, 3, 4], dtype=np.int64)
+    network_timestamps = np.array([5, 20, 30, 40], dtype=np.int64)
+    network_codes = np.array([101, 102, 103, 104], dtype=np.int64)
+
+    # sorted sources are merged pairwise
+    sorted_timestamps, sorted_codes = _merge_events(
+        [ttl_timestamps, network_timestamps], [ttl_codes, network_codes]
+    )
+    assert np.array_equal(sorted_timestamps, [5, 10, 20, 20, 20, 30, 30, 40])
+    assert np.array_equal(sorted_codes, [101, 1, 2, 3, 102, 4, 103, 104])
+
+    # an unsorted source falls back to a stable sort of all events
+    unsorted_timestamps, unsorted_codes = _merge_events(
+        [ttl_timestamps, network_timestamps[::-1]], [ttl_codes, network_codes[::-1]]
+    )
+    assert np.array_equal(unsorted_timestamps, [5, 10, 20, 20, 20, 30, 30, 40])
+    assert np.array_equal(unsorted_codes, [101, 1, 2, 3, 102, 4, 103, 104])
+
+    for timestamps_ns, event_codes in [
+        (sorted_timestamps, sorted_codes),
+        (unsorted_timestamps, unsorted_codes),
+    ]:
+        assert timestamps_ns.dtype == np.int64
+        assert event_codes.dtype == np.int32
+
+
+def test_merge_events_without_sources():
+    timestamps_ns, event_codes = _merge_events([], [])
+    assert timestamps_ns.shape == (0,)
+    assert timestamps_ns.dtype == np.int64
+    assert event_codes.dtype == np.int32
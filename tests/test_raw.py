@@ -0,0 +1,189 @@
+from types import SimpleNamespace
+
+import pytest
+import numpy as np
+
+from oecon.raw import RawConfig, process_oe_raw_data
+from open_ephys.analysis.recording import ContinuousMetadata
+from dh5io.create import create_dh_file
+
+
+def create_recording(n_samples, n_channels, seed=42):
+    """Create a recording with one stream of random int16 samples.
+
+    process_oe_raw_data only uses the samples and metadata of the continuous
+    streams, so plain namespaces stand in for the open-ephys classes.
+    """
+    rng = np.random.default_rng(seed)
+    samples = rng.integers(-1000, 1000, size=(n_samples, n_channels), dtype=np.int16)
+    metadata = ContinuousMetadata(
+        channel_names=[f"CH{i + 1}" for i in range(n_channels)],
+        sample_rate=30000,
+        source_node_name="test_node",
+        source_node_id=100,
+        stream_name="example_data",
+        num_channels=n_channels,
+        bit_volts=[0.195 * (i + 1) for i in range(n_channels)],
+    )
+    continuous = SimpleNamespace(samples=samples, metadata=metadata)
+    return SimpleNamespace(continuous=[continuous])
+
+
+@pytest.fixture
+def dh5file(tmp_path):
+    return create_dh_file(str(tmp_path / "test.dh5"), overwrite=True, validate=False)
+
+
+def data_datasets(dh5file):
+    """Return the DATA datasets of all CONT groups ordered by id"""
+    return [
+        dh5file.file[f"CONT{cont_id}"]["DATA"]
+        for cont_id in sorted(dh5file.get_cont_group_ids())
+    ]
+
+
+def test_raw_config_rejects_compression_opts_without_gzip():
+    with pytest.raises(ValueError, match="only supported for gzip"):
+        RawConfig(compression="lzf", compression_opts=4)
+
+    with pytest.raises(ValueError, match="only supported for gzip"):
+        RawConfig(compression=None, compression_opts=4)
+
+
+@pytest.mark.parametrize("split_channels", [True, False])
+@pytest.mark.parametrize(
+    "compression, compression_opts", [(None, None), ("lzf", None), ("gzip", 9)]
+)
+def test_process_oe_raw_data_compression(
+    dh5file, split_channels, compression, compression_opts
+):
+    """Test that all supported compression settings can be written"""
+    recording = create_recording(n_samples=1000, n_channels=2)
+    config = RawConfig(
+        split_channels_into_cont_blocks=split_channels, compression=compression
+    )
+    if compression_opts is not None:
+        config.compression_opts = compression_opts
+
+    process_oe_raw_data(config, recording, dh5file)
+
+    for data in data_datasets(dh5file):
+        assert data.compression == compression
+        if compression_opts is not None:
+            assert data.compression_opts == compression_opts
+
+
+@pytest.mark.parametrize("split_channels", [True, False])
+def test_process_oe_raw_data_empty_stream(dh5file, split_channels):
+    """Test that a stream without samples results in empty DATA datasets"""
+    recording = create_recording(n_samples=0, n_channels=2)
+    config = RawConfig(split_channels_into_cont_blocks=split_channels)
+
+    process_oe_raw_data(config, recording, dh5file)
+
+    datasets = data_datasets(dh5file)
+    assert len(datasets) == (2 if split_channels else 1)
+    for data in datasets:
+        assert data.shape == (0, 1 if split_channels else 2)
+
+
+@pytest.mark.parametrize("split_channels", [True, False])
+@pytest.mark.parametrize(
+    "included_channel_names, channel_indices",
+    [(None, [0, 1, 2]), (["CH1", "CH3"], [0, 2])],
+)
+def test_process_oe_raw_data(
+    dh5file, split_channels, included_channel_names, channel_indices
+):
+    """Test the written data and attributes of the CONT groups.
+
+    The number of samples is larger than and not a multiple of chunk_samples,
+    so the data is written in several blocks with a shorter last block.
+    """
+    recording = create_recording(n_samples=1000, n_channels=3)
+    samples = recording.continuous[0].samples
+    bit_volts = np.asarray(recording.continuous[0].metadata.bit_volts)
+    config = RawConfig(
+        split_channels_into_cont_blocks=split_channels,
+        included_channel_names=included_channel_names,
+        chunk_samples=300,
+    )
+
+    result_config = process_oe_raw_data(config, recording, dh5file)
+
+    if included_channel_names is None:
+        assert result_config.included_channel_names == ["CH1", "CH2", "CH3"]
+
+    if split_channels:
+        # one CONT group per channel, numbered by the channel index in the stream
+        cont_ids = [1 + channel_index for channel_index in channel_indices]
+        expected = [samples[:, [channel_index]] for channel_index in channel_indices]
+        expected_board_channels = [[channel_index] for channel_index in channel_indices]
+        expected_calibration = [
+            bit_volts[channel_index] for channel_index in channel_indices
+        ]
+    else:
+        cont_ids = [1]
+        expected = [samples[:, channel_indices]]
+        expected_board_channels = [channel_indices]
+        expected_calibration = [bit_volts[channel_indices]]
+    assert sorted(dh5file.get_cont_group_ids()) == cont_ids
+
+    global_channel_number = 0
+    for cont_id, expected_data, board_channels, calibration in zip(
+        cont_ids, expected, expected_board_channels, expected_calibration
+    ):
+        cont_group = dh5file.file[f"CONT{cont_id}"]
+        data = cont_group["DATA"]
+        np.testing.assert_array_equal(data[()], expected_data)
+        assert data.dtype == np.int16
+        assert data.chunks == (300, 1)
+        assert data.compression == "gzip"
+        assert data.shuffle
+
+        channels = np.atleast_1d(cont_group.attrs["Channels"])
+        n_channels = len(board_channels)
+        np.testing.assert_array_equal(
+            channels["GlobalChanNumber"],
+            np.arange(global_channel_number, global_channel_number + n_channels),
+        )
+        np.testing.assert_array_equal(channels["BoardChanNo"], board_channels)
+        global_channel_number += n_channels
+
+        np.testing.assert_allclose(cont_group.attrs["Calibration"], calibration)
+        assert cont_group.attrs["SamplePeriod"] == 33333
+
+
+class CountingSamples:
+    """Wraps the samples of a stream and counts how often they are read"""
+
+    def __init__(self, samples):
+        self.samples = samples
+        self.shape = samples.shape
+        self.n_reads = 0
+
+    def __getitem__(self, key):
+        self.n_reads += 1
+        return self.samples[key]
+
+
+@pytest.mark.parametrize("split_channels", [True, False])
+def test_process_oe_raw_data_skips_unselected_streams(dh5file, split_channels):
+    """Test that streams without selected channels are not read at all"""
+    recording = create_recording(n_samples=1000, n_channels=2)
+    other_stream = create_recording(n_samples=1000, n_channels=2).continuous[0]
+    other_stream.metadata.channel_names = ["AI1", "AI2"]
+    other_stream.metadata.stream_name = "PXIe-6341"
+    other_stream.samples = CountingSamples(other_stream.samples)
+    recording.continuous.append(other_stream)
+
+    config = RawConfig(
+        split_channels_into_cont_blocks=split_channels,
+        included_channel_names=["CH2"],
+        chunk_samples=300,
+    )
+
+    process_oe_raw_data(config, recording, dh5file)
+
+    assert other_stream.samples.n_reads == 0
+    assert sorted(dh5file.get_cont_group_ids()) == [2 if split_channels else 1]
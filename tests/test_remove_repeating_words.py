@@ -37,3 +37,39 @@ def test_remove_repeating_words():
     assert isinstance(full_word_datat, FullWordEvent)
     assert len(full_word_datat) == 5
     assert np.array_equal(full_word_datat.full_words, np.array([1, 3, 4, 128, 129]))
+
+
+def test_remove_repeating_words_keeps_large_codes_and_empty_input():
+    metadata = EventMetadata(
+        folder_name="test_folder",
+        source_processor="Network Events",
+        stream_name="PXIe-6341",
+        initial_state=0,
+        identifier="",
+        sample_rate=1000.0,
+        channel_name="",
+        type="",
+        description="",
+    )
+    # neighbouring 64-bit codes collapse when compared as float64
+    full_words = np.array([2**60, 2**60 + 1, 2**60 + 1], dtype=np.int64)
+    event_data = Event(
+        states=np.zeros(3, dtype=np.int64),
+        full_words=full_words,
+        timestamps=np.array([1.0, 2.0, 2.0]),
+        metadata=metadata,
+        sample_numbers=np.array([1, 2, 2]),
+    )
+    full_word_data = remove_repeating_simultaneous_words(event_data)
+    assert np.array_equal(full_word_data.full_words, full_words[:2])
+    assert np.array_equal(full_word_data.sample_numbers, np.array([1, 2]))
+
+    empty = np.array([], dtype=np.int64)
+    empty_event = Event(
+        states=empty,
+        full_words=empty,
+        timestamps=np.array([], dtype=np.float64),
+        metadata=metadata,
+        sample_numbers=empty,
+    )
+    assert len(remove_repeating_simultaneous_words(empty_event)) == 0